@@ -0,0 +1,53 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from ..services.profiling_service import get_profiling_settings, get_slow_requests
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Allow access only with the configured PROFILE_ADMIN_TOKEN."""
+    admin_token = get_profiling_settings().admin_token
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """
+    List the slowest recent profiled requests with their per-span totals.
+    """
+    return [profile.summary() for profile in get_slow_requests().profiles()]
+
+
+@router.get(
+    "/profiles/flamegraph",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def download_flamegraph(profile_id: Optional[str] = None):
+    """
+    Download profiles as folded stacks for flamegraph.pl or speedscope.
+
+    Returns a single profile when `profile_id` is given, otherwise every
+    buffered profile.
+    """
+    if profile_id:
+        profile = get_slow_requests().get(profile_id)
+        if not profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        profiles = [profile]
+    else:
+        profiles = get_slow_requests().profiles()
+
+    lines = [line for profile in profiles for line in profile.folded_stacks()]
+    return PlainTextResponse(
+        "\n".join(lines) + "\n",
+        headers={"Content-Disposition": "attachment; filename=profiles.folded"},
+    )
@@ -1,10 +1,16 @@
-from typing import List, Optional
+import json
+from contextlib import aclosing
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 
 from ..schemas.request_models import SearchQuery
 from ..schemas.response_models import VideoSearchResult
+from ..services.admission_service import OverloadedError
 from ..services.google_search_service import GoogleSearchService
+from ..services.suggestion_service import get_suggestion_index
 from ..services.youtube_service import YouTubeService
 
 router = APIRouter()
@@ -19,9 +25,50 @@ def get_youtube_service() -> YouTubeService:
     return YouTubeService()
 
 
+async def search_page(
+    query: SearchQuery,
+    google_search_service: GoogleSearchService,
+    youtube_service: YouTubeService,
+) -> Tuple[List[str], Optional[str], bool]:
+    """
+    Resolve one page of video IDs for a search, the cursor for the next,
+    and whether the query resolved as a video URL or ID rather than a
+    text search.
+
+    Cursors are `cse:<start>` for Google Custom Search pages and
+    `yt:<pageToken>` for YouTube search pages, so a follow-up request keeps
+    paging through the same source.
+    """
+    source, _, position = (query.page_token or "").partition(":")
+
+    if source != "yt":
+        # First try to find videos via Google Search
+        start = int(position) if source == "cse" and position.isdigit() else 1
+        video_ids, next_start = await google_search_service.search_video_ids(
+            query.query, query.max_results, start
+        )
+        if video_ids:
+            return video_ids, f"cse:{next_start}" if next_start else None, False
+        if source == "cse":
+            # Google results are exhausted, don't restart on YouTube
+            return [], None, False
+
+        # A YouTube URL or video ID resolves to that one video
+        video_id = await youtube_service.extract_video_id(query.query)
+        if video_id:
+            return [video_id], None, True
+
+    # If no results from Google, use YouTube API directly
+    video_ids, next_page_token = await youtube_service.search_video_ids(
+        query.query, query.max_results, position if source == "yt" else None
+    )
+    return video_ids, f"yt:{next_page_token}" if next_page_token else None, False
+
+
 @router.post("/search", response_model=List[VideoSearchResult])
 async def search_videos(
     query: SearchQuery,
+    response: Response,
     google_search_service: GoogleSearchService = Depends(get_google_search_service),
     youtube_service: YouTubeService = Depends(get_youtube_service),
 ):
@@ -29,15 +76,14 @@ async def search_videos(
     Search for YouTube videos based on the provided query.
 
     First tries to find videos through Google Custom Search API,
-    then falls back to direct YouTube search if needed.
+    then falls back to direct YouTube search if needed. The cursor for the
+    next page is returned in the X-Next-Page-Token header.
     """
     try:
-        # First try to find videos via Google Search
-        videos = await google_search_service.search_videos(query.query)
-
-        # If no results from Google, use YouTube API directly
-        if not videos:
-            videos = await youtube_service.search_videos(query.query)
+        video_ids, next_page_token, video_reference = await search_page(
+            query, google_search_service, youtube_service
+        )
+        videos = await youtube_service.get_videos_details(video_ids)
 
         # If still no results, raise an exception
         if not videos:
@@ -45,12 +91,70 @@ async def search_videos(
                 status_code=404, detail="No videos found for the given query."
             )
 
+        # Feed the autocomplete index with the query and returned titles
+        get_suggestion_index().record_search(query.query, videos, video_reference)
+
+        if next_page_token:
+            response.headers["X-Next-Page-Token"] = next_page_token
         return videos
+    except OverloadedError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to search for videos: {str(e)}"
+        )
+
+
+@router.post("/search/stream")
+async def stream_search_videos(
+    query: SearchQuery,
+    google_search_service: GoogleSearchService = Depends(get_google_search_service),
+    youtube_service: YouTubeService = Depends(get_youtube_service),
+):
+    """
+    Search for YouTube videos and stream the results as NDJSON.
+
+    Each line is a VideoSearchResult, sent as soon as its details resolve,
+    in rank order. The cursor for the next page is returned in the
+    X-Next-Page-Token header. If a lookup fails mid-stream, a final
+    `{"error": ...}` line is sent.
+    """
+    try:
+        video_ids, next_page_token, video_reference = await search_page(
+            query, google_search_service, youtube_service
+        )
+    except OverloadedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to search for videos: {str(e)}"
         )
 
+    if not video_ids:
+        raise HTTPException(
+            status_code=404, detail="No videos found for the given query."
+        )
+
+    async def ndjson_lines():
+        videos = []
+        try:
+            # Closing the iterator on client disconnect stops further lookups
+            async with aclosing(
+                youtube_service.iter_videos_details(video_ids)
+            ) as results:
+                async for video in results:
+                    videos.append(video)
+                    yield json.dumps(jsonable_encoder(video)) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Failed to search for videos: {str(e)}"}) + "\n"
+        finally:
+            get_suggestion_index().record_search(query.query, videos, video_reference)
+
+    headers = {"X-Next-Page-Token": next_page_token} if next_page_token else None
+    return StreamingResponse(
+        ndjson_lines(), media_type="application/x-ndjson", headers=headers
+    )
+
 
 @router.get("/video/{video_id}", response_model=VideoSearchResult)
 async def get_video_details(
@@ -63,7 +167,10 @@ async def get_video_details(
         video = await youtube_service.get_video_details(video_id)
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
+        get_suggestion_index().record_video(video)
         return video
+    except OverloadedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to get video details: {str(e)}"
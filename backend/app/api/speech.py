@@ -4,6 +4,7 @@ import io
 from fastapi import APIRouter, Depends, HTTPException, Response
 
 from ..schemas.request_models import TextToSpeechRequest
+from ..services.admission_service import OverloadedError
 from ..services.ai_service import AIService
 
 router = APIRouter()
@@ -29,6 +30,8 @@ async def text_to_speech(
         audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
 
         return {"audio_data": audio_base64, "mime_type": "audio/mp3"}
+    except OverloadedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to convert text to speech: {str(e)}"
@@ -52,6 +55,8 @@ async def text_to_speech_download(
             media_type="audio/mp3",
             headers={"Content-Disposition": f"attachment; filename=summary.mp3"},
         )
+    except OverloadedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to convert text to speech: {str(e)}"
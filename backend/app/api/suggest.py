@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Query
+
+from ..schemas.response_models import SuggestResponse
+from ..services.suggestion_service import get_suggestion_index
+
+router = APIRouter()
+
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_queries(
+    q: str = Query(..., description="The partial query typed so far"),
+    limit: int = Query(8, ge=1, le=10, description="Maximum suggestions to return"),
+):
+    """
+    Suggest query completions while the user is typing.
+
+    Served entirely from the in-memory index of past queries and seen video
+    titles, so it costs no search quota.
+    """
+    suggestions = get_suggestion_index().suggest(q, limit)
+    return SuggestResponse(query=q, suggestions=suggestions)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from ..schemas.request_models import SummaryRequest
 from ..schemas.response_models import SummaryResponse
+from ..services.admission_service import OverloadedError
 from ..services.ai_service import AIService
 from ..services.youtube_service import YouTubeService
 
@@ -58,6 +59,8 @@ async def generate_summary(
                 else None
             ),
         )
+    except OverloadedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to generate summary: {str(e)}"
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from ..schemas.request_models import TranscriptRequest
 from ..schemas.response_models import TranscriptResponse
+from ..services.admission_service import OverloadedError
 from ..services.youtube_service import YouTubeService
 
 router = APIRouter()
@@ -27,6 +28,8 @@ async def get_transcript(
                 status_code=404, detail="Transcript not available for this video."
             )
         return TranscriptResponse(video_id=request.video_id, transcript=transcript)
+    except OverloadedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to extract transcript: {str(e)}"
@@ -1,10 +1,16 @@
+import asyncio
 import os
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from .api import search, speech, summary, transcript
+from .api import profiling, search, speech, suggest, summary, transcript
+from .middleware.admission import AdmissionMiddleware, overloaded_response
+from .middleware.profiling import ProfilingMiddleware
+from .services.admission_service import OverloadedError, admission_stats
+from .services.proxy_pool_service import get_transcript_proxy_pool
+from .services.suggestion_service import get_suggestion_index
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +34,13 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# Per-route concurrency limits and priority admission. Added before CORS so
+# that CORS stays outermost and shed responses still carry CORS headers.
+app.add_middleware(AdmissionMiddleware)
+
+# Opt-in request profiling, outside admission so queueing time is included
+app.add_middleware(ProfilingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,6 +48,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the paging cursor, back-off and profile headers
+    expose_headers=["X-Next-Page-Token", "Retry-After", "X-Profile-Id"],
 )
 
 # Include API routers
@@ -42,6 +57,26 @@ app.include_router(search.router, prefix="/api", tags=["search"])
 app.include_router(transcript.router, prefix="/api", tags=["transcript"])
 app.include_router(summary.router, prefix="/api", tags=["summary"])
 app.include_router(speech.router, prefix="/api", tags=["speech"])
+app.include_router(suggest.router, prefix="/api", tags=["suggest"])
+app.include_router(profiling.router, prefix="/admin", tags=["admin"])
+
+
+@app.on_event("startup")
+async def load_suggestion_index():
+    """Restore the autocomplete index from its last snapshot"""
+    await asyncio.to_thread(get_suggestion_index().load)
+
+
+@app.on_event("shutdown")
+async def save_suggestion_index():
+    """Snapshot the autocomplete index so it survives restarts"""
+    await get_suggestion_index().snapshot()
+
+
+@app.exception_handler(OverloadedError)
+async def overloaded_exception_handler(request: Request, exc: OverloadedError):
+    """Return 429/503 with Retry-After when an upstream limiter sheds a request"""
+    return overloaded_response(exc)
 
 
 @app.get("/")
@@ -50,6 +85,18 @@ async def root():
     return {"status": "online", "message": "YouTube Video Analyzer API is running"}
 
 
+@app.get("/admission/stats")
+async def get_admission_stats():
+    """Queue depth and concurrency usage per route and upstream, for autoscaling"""
+    return admission_stats()
+
+
+@app.get("/proxy-pool/stats")
+async def get_proxy_pool_stats():
+    """Health, latency and load of each transcript proxy"""
+    return get_transcript_proxy_pool().stats()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,88 @@
+import time
+
+from fastapi.responses import JSONResponse
+
+from ..services.admission_service import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_NAMES,
+    ROUTE_QUEUE_TIMEOUTS,
+    OverloadedError,
+    current_deadline,
+    current_priority,
+    limiter_for_path,
+)
+from ..services.profiling_service import span
+
+
+def overloaded_response(error: OverloadedError) -> JSONResponse:
+    """Build the 429/503 response for a shed request."""
+    return JSONResponse(
+        status_code=error.status_code,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying per-route concurrency limits.
+
+    Clients may send `X-Request-Priority` (interactive, batch or prefetch) and
+    `X-Request-Deadline-Ms` (time budget for the request). Interactive
+    requests are admitted ahead of batch and prefetch work, and requests
+    whose deadline cannot be met are shed with 429/503 and `Retry-After`.
+    The slot is held until the response body has been fully sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route, limiter = limiter_for_path(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            key.decode("latin-1").lower(): value.decode("latin-1")
+            for key, value in scope.get("headers", [])
+        }
+        priority = PRIORITY_NAMES.get(
+            headers.get("x-request-priority", "").strip().lower(),
+            PRIORITY_INTERACTIVE,
+        )
+
+        # An explicit client deadline covers the whole request, including
+        # upstream queues; the route default only bounds admission wait
+        client_deadline = None
+        try:
+            if "x-request-deadline-ms" in headers:
+                client_deadline = (
+                    time.monotonic() + float(headers["x-request-deadline-ms"]) / 1000
+                )
+        except ValueError:
+            pass
+        deadline = client_deadline
+        if deadline is None and route in ROUTE_QUEUE_TIMEOUTS:
+            deadline = time.monotonic() + ROUTE_QUEUE_TIMEOUTS[route]
+
+        try:
+            with span("admission"):
+                await limiter.acquire(priority, deadline)
+        except OverloadedError as e:
+            await overloaded_response(e)(scope, receive, send)
+            return
+
+        priority_token = current_priority.set(priority)
+        deadline_token = current_deadline.set(client_deadline)
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_priority.reset(priority_token)
+            current_deadline.reset(deadline_token)
+            limiter.release(time.monotonic() - started)
@@ -0,0 +1,56 @@
+import random
+
+from ..services.profiling_service import (
+    RequestProfile,
+    current_profile,
+    get_profiling_settings,
+    get_slow_requests,
+)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles opted-in requests.
+
+    A request is profiled when it carries the profile header (`X-Profile`
+    by default) or is picked by PROFILE_SAMPLE_RATE. Its spans are kept in
+    the slow request buffer and its profile ID is returned in the
+    `X-Profile-Id` response header. Other requests pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, scope) -> bool:
+        settings = get_profiling_settings()
+        if settings.sample_rate and random.random() < settings.sample_rate:
+            return True
+        for key, value in scope.get("headers", []):
+            if key == settings.header_bytes:
+                return value.strip().lower() not in (b"", b"0", b"false")
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(f"{scope['method']} {scope['path']}")
+        status_code = None
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            current_profile.reset(token)
+            profile.finish(status_code)
+            get_slow_requests().add(profile)
@@ -6,6 +6,13 @@ class SearchQuery(BaseModel):
     """Request model for searching videos"""
 
     query: str = Field(..., description="The search query or YouTube URL")
+    max_results: int = Field(
+        5, ge=1, le=50, description="Maximum number of videos to return"
+    )
+    page_token: Optional[str] = Field(
+        None,
+        description="Cursor from the X-Next-Page-Token header of a previous search",
+    )
 
 
 class TranscriptRequest(BaseModel):
@@ -32,3 +32,10 @@ class SummaryResponse(BaseModel):
     summary: str
     key_points: List[str]
     sentiment: Optional[Dict[str, Any]] = None
+
+
+class SuggestResponse(BaseModel):
+    """Model for query autocomplete suggestions"""
+
+    query: str
+    suggestions: List[str]
@@ -0,0 +1,281 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from .profiling_service import span
+
+# Request priority classes, lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_PREFETCH = 2
+
+PRIORITY_NAMES = {
+    "interactive": PRIORITY_INTERACTIVE,
+    "batch": PRIORITY_BATCH,
+    "bulk": PRIORITY_BATCH,
+    "prefetch": PRIORITY_PREFETCH,
+}
+
+# Priority and absolute deadline (time.monotonic()) of the request being
+# handled, set by the admission middleware and honoured by upstream limiters
+current_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "current_priority", default=PRIORITY_INTERACTIVE
+)
+current_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "current_deadline", default=None
+)
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed instead of being queued or served."""
+
+    def __init__(self, message: str, status_code: int = 503, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, int(retry_after))
+
+
+class PriorityLimiter:
+    """
+    Concurrency limiter with a bounded priority queue.
+
+    Waiters are woken in (priority, arrival) order. A request is shed with
+    429 when the queue is full, and with 503 when its deadline would pass
+    before a slot is likely to free up.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # Exponentially weighted average of how long a slot is held
+        self._avg_hold_time = 1.0
+        self.shed_count = 0
+        self.served_count = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def estimated_wait(self, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Estimate seconds until a new request of this priority gets a slot."""
+        if self._active < self.max_concurrency and not self._waiters:
+            return 0.0
+        ahead = sum(1 for waiter in self._waiters if waiter[0] <= priority)
+        return (ahead + 1) * self._avg_hold_time / self.max_concurrency
+
+    def _retry_after(self) -> int:
+        return math.ceil(self.estimated_wait(PRIORITY_PREFETCH)) or 1
+
+    def _shed(self, message: str, status_code: int) -> OverloadedError:
+        self.shed_count += 1
+        return OverloadedError(
+            f"{self.name}: {message}",
+            status_code=status_code,
+            retry_after=self._retry_after(),
+        )
+
+    async def acquire(
+        self, priority: int = PRIORITY_INTERACTIVE, deadline: Optional[float] = None
+    ) -> None:
+        """Wait for a slot, or raise OverloadedError if the request is shed."""
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed("queue is full", 429)
+
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or self.estimated_wait(priority) > timeout:
+                raise self._shed("deadline cannot be met", 503)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+        except BaseException:
+            self._abandon(entry)
+            raise
+
+        if not future.done():
+            self._abandon(entry)
+            raise self._shed("timed out waiting in queue", 503)
+
+    def _abandon(self, entry: Tuple[int, int, asyncio.Future]) -> None:
+        future = entry[2]
+        if future.done() and not future.cancelled():
+            # A slot was handed over just as we gave up, pass it on
+            self.release()
+            return
+        future.cancel()
+        try:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        except ValueError:
+            pass
+
+    def release(self, hold_time: Optional[float] = None) -> None:
+        """Free a slot, handing it directly to the highest priority waiter."""
+        if hold_time is not None:
+            self.served_count += 1
+            self._avg_hold_time = 0.8 * self._avg_hold_time + 0.2 * hold_time
+
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self._active = max(0, self._active - 1)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ):
+        """Hold a slot for the duration of the block."""
+        if priority is None:
+            priority = current_priority.get()
+        if deadline is None:
+            deadline = current_deadline.get()
+
+        with span("queue"):
+            await self.acquire(priority, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "avg_hold_time": round(self._avg_hold_time, 4),
+            "served": self.served_count,
+            "shed": self.shed_count,
+        }
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _build_limiter(prefix: str, key: str, concurrency: int) -> PriorityLimiter:
+    env_key = key.upper().replace("-", "_").replace("/", "")
+    max_concurrency = _env_int(f"{prefix}_{env_key}_CONCURRENCY", concurrency)
+    max_queue = _env_int(f"{prefix}_{env_key}_QUEUE", max_concurrency * 4)
+    return PriorityLimiter(key, max_concurrency, max_queue)
+
+
+# Per-route limits, matched on path prefix. Cheap interactive routes get
+# more room than the LLM and TTS routes that tie up Groq and gTTS.
+ROUTE_LIMITS = {
+    "/api/search": 32,
+    "/api/video": 32,
+    "/api/transcript": 8,
+    "/api/summary": 4,
+    "/api/text-to-speech": 4,
+}
+
+# Default time a request may spend waiting for admission, in seconds
+ROUTE_QUEUE_TIMEOUTS = {
+    "/api/search": 5.0,
+    "/api/video": 5.0,
+    "/api/transcript": 15.0,
+    "/api/summary": 30.0,
+    "/api/text-to-speech": 30.0,
+}
+
+# Per-upstream limits shared by every route that calls the upstream. The
+# transcript limit is registered by the proxy pool, sized to its capacity.
+UPSTREAM_LIMITS = {
+    "groq": 4,
+    "youtube": 16,
+    "google_search": 8,
+    "tts": 2,
+}
+
+# Limiters are built on first use, so overrides loaded from .env apply
+_route_limiters: Optional[Dict[str, PriorityLimiter]] = None
+_upstream_limiters: Dict[str, PriorityLimiter] = {}
+
+
+def route_limiters() -> Dict[str, PriorityLimiter]:
+    """Limiters for every admission-controlled route prefix."""
+    global _route_limiters
+    if _route_limiters is None:
+        _route_limiters = {
+            route: _build_limiter("ADMISSION", route.rsplit("/", 1)[-1], limit)
+            for route, limit in ROUTE_LIMITS.items()
+        }
+    return _route_limiters
+
+
+def upstream_limiter(name: str) -> PriorityLimiter:
+    """Limiter for the named upstream, built from UPSTREAM_LIMITS if needed."""
+    if name not in _upstream_limiters:
+        _upstream_limiters[name] = _build_limiter(
+            "UPSTREAM", name, UPSTREAM_LIMITS[name]
+        )
+    return _upstream_limiters[name]
+
+
+def limiter_for_path(path: str) -> Tuple[Optional[str], Optional[PriorityLimiter]]:
+    """Return the route prefix and limiter that govern the given path."""
+    for route, limiter in route_limiters().items():
+        if path == route or path.startswith(route + "/"):
+            return route, limiter
+    return None, None
+
+
+def register_upstream(name: str, concurrency: int) -> PriorityLimiter:
+    """Create (or replace) the limiter for an upstream with a default limit."""
+    _upstream_limiters[name] = _build_limiter("UPSTREAM", name, concurrency)
+    return _upstream_limiters[name]
+
+
+@asynccontextmanager
+async def upstream_slot(name: str):
+    """Hold a concurrency slot for the named upstream service."""
+    with span(f"upstream:{name}"):
+        async with upstream_limiter(name).slot():
+            yield
+
+
+def admission_stats() -> Dict[str, Any]:
+    """Queue depth and utilisation for every limiter, for autoscaling."""
+    routes = {route: limiter.stats() for route, limiter in route_limiters().items()}
+    upstreams = {
+        name: upstream_limiter(name).stats()
+        for name in {**UPSTREAM_LIMITS, **_upstream_limiters}
+    }
+    return {
+        "queue_depth": sum(s["queue_depth"] for s in routes.values()),
+        "active": sum(s["active"] for s in routes.values()),
+        "routes": routes,
+        "upstreams": upstreams,
+    }
@@ -1,5 +1,7 @@
+import asyncio
 import os
 import json
+import re
 from typing import List, Optional, Dict, Any
 from langchain_groq import ChatGroq
 from langchain.schema import SystemMessage, HumanMessage
@@ -8,6 +10,10 @@ from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
 import gtts
 import io
 
+from .admission_service import upstream_slot
+from .batching_service import MicroBatcher
+from .profiling_service import span
+
 
 class AIService:
     def __init__(self):
@@ -77,7 +83,9 @@ class AIService:
         ]
 
         # Generate summary
-        response = await llm.agenerate([messages])
+        with span("llm.generate_summary"):
+            async with upstream_slot("groq"):
+                response = await llm.agenerate([messages])
         summary = response.generations[0][0].text.strip()
 
         return summary
@@ -85,6 +93,18 @@ class AIService:
     async def extract_key_points(self, summary: str) -> List[str]:
         """
         Extract key points from a summary using the Groq LLM.
+
+        Concurrent calls are packed into shared prompts by the micro-batcher.
+        """
+        batcher = _get_batcher("key_points")
+        if batcher is None:
+            return await self._extract_key_points_single(summary)
+        with span("batch.extract_key_points"):
+            return await batcher.submit(summary)
+
+    async def _extract_key_points_single(self, summary: str) -> List[str]:
+        """
+        Extract key points from a single summary with its own Groq call.
         """
         llm = self._get_llm()
 
@@ -116,34 +136,49 @@ class AIService:
         ]
 
         # Generate key points
-        response = await llm.agenerate([messages])
+        with span("llm.extract_key_points"):
+            async with upstream_slot("groq"):
+                response = await llm.agenerate([messages])
         result = response.generations[0][0].text.strip()
 
-        try:
-            # Try to parse JSON directly
-            json_result = json.loads(result)
-            if isinstance(json_result, dict) and "key_points" in json_result:
-                return json_result["key_points"]
-            elif isinstance(json_result, list):
-                return json_result
-        except json.JSONDecodeError:
-            # If JSON parsing fails, try to extract key points with regex
-            import re
-
-            # Look for anything that might be a list of points
-            points = re.findall(r'"([^"]+)"', result)
-            if points:
-                return points
-
-            # Fall back to line-by-line extraction
-            lines = [line.strip() for line in result.split("\n") if line.strip()]
-            # Remove list markers and other formatting
-            clean_lines = [re.sub(r"^[\d\-\*\•\.]+\s*", "", line) for line in lines]
-            return clean_lines[:5]  # Limit to 5 points
+        with span("parse.extract_key_points"):
+            try:
+                # Try to parse JSON directly
+                json_result = json.loads(result)
+                if isinstance(json_result, dict) and "key_points" in json_result:
+                    return json_result["key_points"]
+                elif isinstance(json_result, list):
+                    return json_result
+            except json.JSONDecodeError:
+                # If JSON parsing fails, try to extract key points with regex
+                import re
+
+                # Look for anything that might be a list of points
+                points = re.findall(r'"([^"]+)"', result)
+                if points:
+                    return points
+
+                # Fall back to line-by-line extraction
+                lines = [line.strip() for line in result.split("\n") if line.strip()]
+                # Remove list markers and other formatting
+                clean_lines = [re.sub(r"^[\d\-\*\•\.]+\s*", "", line) for line in lines]
+                return clean_lines[:5]  # Limit to 5 points
 
     async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """
         Analyze the sentiment of the video content.
+
+        Concurrent calls are packed into shared prompts by the micro-batcher.
+        """
+        batcher = _get_batcher("sentiment")
+        if batcher is None:
+            return await self._analyze_sentiment_single(text)
+        with span("batch.analyze_sentiment"):
+            return await batcher.submit(text)
+
+    async def _analyze_sentiment_single(self, text: str) -> Dict[str, Any]:
+        """
+        Analyze the sentiment of a single text with its own Groq call.
         """
         llm = self._get_llm()
 
@@ -165,28 +200,129 @@ class AIService:
 
         chain = prompt | llm
 
-        result = await chain.ainvoke({"text": text})
+        with span("llm.analyze_sentiment"):
+            async with upstream_slot("groq"):
+                result = await chain.ainvoke({"text": text})
         result_text = result.content
 
-        try:
-            # Try to parse the JSON response
-            if isinstance(result_text, str):
-                # Find JSON in the string if there's other text
-                import re
+        with span("parse.analyze_sentiment"):
+            try:
+                # Try to parse the JSON response
+                if isinstance(result_text, str):
+                    # Find JSON in the string if there's other text
+                    import re
+
+                    json_match = re.search(r"\{.*\}", result_text, re.DOTALL)
+                    if json_match:
+                        json_str = json_match.group(0)
+                        return json.loads(json_str)
+                    return json.loads(result_text)
+                return result_text
+            except json.JSONDecodeError:
+                # Fallback if JSON parsing fails
+                return {
+                    "overall_sentiment": "neutral",
+                    "sentiment_score": 0,
+                    "emotional_tones": ["unknown"],
+                }
 
-                json_match = re.search(r"\{.*\}", result_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                    return json.loads(json_str)
-                return json.loads(result_text)
-            return result_text
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return {
-                "overall_sentiment": "neutral",
-                "sentiment_score": 0,
-                "emotional_tones": ["unknown"],
-            }
+    async def _generate_packed(
+        self, system_prompt: str, instructions: str, items: List[str]
+    ) -> str:
+        """
+        Run one Groq call over several items, each tagged with an ID, and
+        return the raw response text.
+        """
+        llm = self._get_llm()
+
+        packed_items = "\n\n".join(
+            f"### ITEM {item_id}\n{item}" for item_id, item in _item_ids(items)
+        )
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=f"{instructions}\n\n{packed_items}"),
+        ]
+
+        async with upstream_slot("groq"):
+            response = await llm.agenerate([messages])
+        return response.generations[0][0].text.strip()
+
+    async def _extract_key_points_batch(self, summaries: List[str]) -> List[Any]:
+        """
+        Extract key points for several summaries with a single Groq call.
+        Items that don't parse come back as None, for the batcher to retry
+        singly.
+        """
+        with span("llm.extract_key_points_batch"):
+            result = await self._generate_packed(
+                system_prompt=(
+                    "You are a precision extractor that identifies the most important points "
+                    "from a text. Return your response in the exact JSON format requested."
+                ),
+                instructions=(
+                    "Each item below is a summary, introduced by a line '### ITEM <id>'. "
+                    "For each summary, extract 3-5 key points or takeaways, formatting each "
+                    "point as a concise sentence that captures an important insight. "
+                    "Return ONLY a JSON object mapping each item id to a JSON array of "
+                    'strings, for example {"1": ["point", "point"], "2": ["point"]}.'
+                ),
+                items=summaries,
+            )
+
+        with span("parse.extract_key_points_batch"):
+            parsed = _parse_packed(result)
+            results: List[Any] = []
+            for item_id, _ in _item_ids(summaries):
+                points = parsed.get(item_id)
+                valid = (
+                    isinstance(points, list)
+                    and points
+                    and all(
+                        isinstance(point, str) and point.strip() for point in points
+                    )
+                )
+                results.append(points if valid else None)
+
+        return results
+
+    async def _analyze_sentiment_batch(self, texts: List[str]) -> List[Any]:
+        """
+        Analyze the sentiment of several texts with a single Groq call.
+        Items that don't parse come back as None, for the batcher to retry
+        singly.
+        """
+        with span("llm.analyze_sentiment_batch"):
+            result = await self._generate_packed(
+                system_prompt=(
+                    "You are a sentiment analysis expert. For each text, produce a JSON object with "
+                    "the following fields: 'overall_sentiment' (positive, negative, or neutral), "
+                    "'sentiment_score' (a number from -1.0 to 1.0, where -1 is very negative and 1 is very positive), "
+                    "and 'emotional_tones' (an array of emotional tones present in the content)."
+                ),
+                instructions=(
+                    "Each item below is a text, introduced by a line '### ITEM <id>'. "
+                    "Analyze the sentiment of each text and return ONLY a JSON object "
+                    "mapping each item id to its sentiment object."
+                ),
+                items=texts,
+            )
+
+        with span("parse.analyze_sentiment_batch"):
+            parsed = _parse_packed(result)
+            results: List[Any] = []
+            for item_id, _ in _item_ids(texts):
+                sentiment = parsed.get(item_id)
+                valid = (
+                    isinstance(sentiment, dict)
+                    and str(sentiment.get("overall_sentiment")).lower()
+                    in ("positive", "negative", "neutral")
+                    and isinstance(sentiment.get("sentiment_score"), (int, float))
+                    and -1 <= sentiment["sentiment_score"] <= 1
+                    and isinstance(sentiment.get("emotional_tones"), list)
+                )
+                results.append(sentiment if valid else None)
+
+        return results
 
     async def text_to_speech(self, text: str) -> bytes:
         """
@@ -196,12 +332,65 @@ class AIService:
         # Create an in-memory bytes buffer
         mp3_fp = io.BytesIO()
 
-        # Convert text to speech
+        # Convert text to speech, off the event loop as gTTS blocks on HTTP
         tts = gtts.gTTS(text=text, lang="en", slow=False)
-        tts.write_to_fp(mp3_fp)
+        async with upstream_slot("tts"):
+            await asyncio.to_thread(tts.write_to_fp, mp3_fp)
 
         # Reset buffer position to the beginning
         mp3_fp.seek(0)
 
         # Return the audio bytes
         return mp3_fp.read()
+
+
+def _item_ids(items: List[str]):
+    """Pair each packed item with the ID used for it in the prompt."""
+    return [(str(i), item) for i, item in enumerate(items, start=1)]
+
+
+def _parse_packed(result: str) -> Dict[str, Any]:
+    """
+    Parse a packed response into its JSON object keyed by item ID, or an
+    empty dict if it can't be parsed.
+    """
+    json_match = re.search(r"\{.*\}", result, re.DOTALL)
+    if not json_match:
+        return {}
+    try:
+        parsed = json.loads(json_match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+# AIService methods behind each batcher: (packed call, single-item call)
+_BATCH_METHODS = {
+    "key_points": ("_extract_key_points_batch", "_extract_key_points_single"),
+    "sentiment": ("_analyze_sentiment_batch", "_analyze_sentiment_single"),
+}
+
+# Built on first use so AI_BATCH_* settings from .env apply
+_batchers: Dict[str, Optional[MicroBatcher]] = {}
+
+
+def _get_batcher(kind: str) -> Optional[MicroBatcher]:
+    """
+    Return the micro-batcher for bulk key point or sentiment calls, or None
+    when AI_BATCH_WINDOW_MS is 0. The character cap keeps a packed prompt
+    within the model's context window.
+    """
+    if kind not in _batchers:
+        window_ms = float(os.getenv("AI_BATCH_WINDOW_MS", 25))
+        batcher = None
+        if window_ms > 0:
+            batch_method, single_method = _BATCH_METHODS[kind]
+            batcher = MicroBatcher(
+                lambda items: getattr(AIService(), batch_method)(items),
+                lambda item: getattr(AIService(), single_method)(item),
+                max_batch_size=int(os.getenv("AI_BATCH_MAX_SIZE", 8)),
+                max_wait=window_ms / 1000,
+                max_batch_chars=int(os.getenv("AI_BATCH_MAX_CHARS", 24000)),
+            )
+        _batchers[kind] = batcher
+    return _batchers[kind]
@@ -0,0 +1,147 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from .admission_service import PRIORITY_PREFETCH, current_deadline, current_priority
+from .profiling_service import current_profile, shared_profile
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for a short window and processes them as
+    one batch.
+
+    `process_batch` receives the pending items in submission order and must
+    return one result per item; a result that is an exception is raised to
+    that item's caller only, and a result of None (or the wrong number of
+    results) sends the item through `process_single` instead. If the batch
+    itself raises, such as when it is shed as overloaded, the error is
+    raised to every caller rather than retried item by item, which would
+    only add load. A lone item goes straight to `process_single`. A batch is flushed when it reaches `max_batch_size`
+    items or `max_batch_chars` characters, or `max_wait` seconds after its
+    first item arrived.
+
+    Batches run in a fresh context with the most urgent priority and the
+    latest deadline among their callers, and their spans are recorded on
+    every caller's profile; single-item calls run in their caller's own
+    context.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[str]], Awaitable[List[Any]]],
+        process_single: Callable[[str], Awaitable[Any]],
+        max_batch_size: int = 8,
+        max_wait: float = 0.025,
+        max_batch_chars: Optional[int] = None,
+    ):
+        self.process_batch = process_batch
+        self.process_single = process_single
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.max_batch_chars = max_batch_chars
+        self._pending: List[Tuple[str, asyncio.Future, contextvars.Context]] = []
+        self._pending_chars = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Keep references so running batches are not garbage collected
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: str) -> Any:
+        """Queue an item for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+
+        if (
+            self._pending
+            and self.max_batch_chars
+            and self._pending_chars + len(item) > self.max_batch_chars
+        ):
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append((item, future, contextvars.copy_context()))
+        self._pending_chars += len(item)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.max_wait, self._flush, context=contextvars.Context()
+            )
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        self._pending_chars = 0
+        if not batch:
+            return
+
+        # Don't let the batch inherit whichever caller happened to flush it
+        loop = asyncio.get_running_loop()
+        task = contextvars.Context().run(loop.create_task, self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(
+        self, batch: List[Tuple[str, asyncio.Future, contextvars.Context]]
+    ) -> None:
+        if len(batch) == 1:
+            await self._run_single(*batch[0])
+            return
+
+        contexts = [context for _, _, context in batch]
+        priorities = [context.get(current_priority, 0) for context in contexts]
+        deadlines = [context.get(current_deadline, None) for context in contexts]
+        current_priority.set(min(priorities, default=PRIORITY_PREFETCH))
+        current_deadline.set(None if None in deadlines else max(deadlines))
+        current_profile.set(shared_profile(contexts))
+
+        try:
+            results = await self.process_batch([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            print(
+                f"Batch returned {len(results)} results for {len(batch)} items, "
+                "retrying items singly"
+            )
+            results = [None] * len(batch)
+
+        retries = []
+        for (item, future, context), result in zip(batch, results):
+            if future.done():
+                # The caller gave up while the batch was running
+                continue
+            if result is None:
+                retries.append(self._run_single(item, future, context))
+            elif isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        if retries:
+            await asyncio.gather(*retries)
+
+    async def _run_single(
+        self, item: str, future: asyncio.Future, context: contextvars.Context
+    ) -> None:
+        # Run in the caller's context so its priority, deadline and profile apply
+        task = context.run(
+            asyncio.get_running_loop().create_task, self.process_single(item)
+        )
+        try:
+            result = await task
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
@@ -1,9 +1,9 @@
 import os
-from typing import List
+from typing import List, Optional, Tuple
 
 import aiohttp
 
-from ..schemas.response_models import VideoSearchResult
+from ..services.admission_service import upstream_slot
 from ..services.youtube_service import YouTubeService
 
 
@@ -14,18 +14,22 @@ class GoogleSearchService:
         self.base_url = "https://www.googleapis.com/customsearch/v1"
         self.youtube_service = YouTubeService()
 
-    async def search_videos(
-        self, query: str, max_results: int = 5
-    ) -> List[VideoSearchResult]:
+    async def search_video_ids(
+        self, query: str, max_results: int = 5, start: int = 1
+    ) -> Tuple[List[str], Optional[int]]:
         """
         Search for YouTube videos using Google Custom Search API.
         This can find more contextually relevant videos than direct YouTube search.
+
+        Returns one page of video IDs starting at the 1-based result index
+        `start`, and the index to continue from. Returns no IDs when the API
+        is not configured or fails, so callers can fall back to YouTube.
         """
         if not self.api_key or not self.search_engine_id:
             print(
                 "Google Search API key or engine ID not configured, falling back to YouTube search"
             )
-            return await self.youtube_service.search_videos(query, max_results)
+            return [], None
 
         # Append "youtube" to the query to improve chances of finding YouTube videos
         enhanced_query = f"{query} youtube"
@@ -34,36 +38,45 @@ class GoogleSearchService:
             "key": self.api_key,
             "cx": self.search_engine_id,
             "q": enhanced_query,
-            "num": max_results
-            * 2,  # Request more results as some might not be YouTube videos
+            # Request more results as some might not be YouTube videos, the
+            # API returns at most 10 per page
+            "num": min(max_results * 2, 10),
+            "start": start,
             "siteSearch": "youtube.com",
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.base_url, params=params) as response:
-                if response.status != 200:
-                    # Log the error and fall back to YouTube search
-                    error_text = await response.text()
-                    print(f"Google Search API error: {error_text}")
-                    return await self.youtube_service.search_videos(query, max_results)
+        async with upstream_slot("google_search"):
+            async with aiohttp.ClientSession() as session:
+                async with session.get(self.base_url, params=params) as response:
+                    if response.status != 200:
+                        # Log the error and let the caller fall back
+                        error_text = await response.text()
+                        print(f"Google Search API error: {error_text}")
+                        return [], None
 
-                data = await response.json()
+                    data = await response.json()
 
-                youtube_urls = []
-                for item in data.get("items", []):
-                    url = item.get("link", "")
-                    if "youtube.com/watch" in url or "youtu.be/" in url:
-                        youtube_urls.append(url)
+        items = data.get("items", [])
+        video_ids = []
+        consumed = 0
+        for item in items:
+            if len(video_ids) >= max_results:
+                break
+            consumed += 1
+            url = item.get("link", "")
+            if "youtube.com/watch" in url or "youtu.be/" in url:
+                video_id = await self.youtube_service.extract_video_id(url)
+                if video_id and video_id not in video_ids:
+                    video_ids.append(video_id)
 
-                # Extract video IDs and get details
-                results = []
-                for url in youtube_urls[:max_results]:
-                    video_id = await self.youtube_service.extract_video_id(url)
-                    if video_id:
-                        video_details = await self.youtube_service.get_video_details(
-                            video_id
-                        )
-                        if video_details:
-                            results.append(video_details)
+        # Resume after the last item used, or at the next page if this one
+        # was used up. The API serves at most 100 results per query.
+        next_start = None
+        if consumed < len(items):
+            next_start = start + consumed
+        elif data.get("queries", {}).get("nextPage"):
+            next_start = data["queries"]["nextPage"][0].get("startIndex")
+        if next_start is not None and next_start > 100:
+            next_start = None
 
-                return results
+        return video_ids, next_start
@@ -0,0 +1,235 @@
+import contextvars
+import heapq
+import itertools
+import os
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+
+class RequestProfile:
+    """Wall-clock spans recorded while handling a single request."""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.status_code: Optional[int] = None
+        # (span path, start offset, duration) in seconds
+        self.spans: List[Tuple[Tuple[str, ...], float, float]] = []
+
+    def add_span(self, path: Tuple[str, ...], start: float, duration: float) -> None:
+        self.spans.append((path, start - self.start, duration))
+
+    def finish(self, status_code: Optional[int]) -> None:
+        self.duration = time.perf_counter() - self.start
+        self.status_code = status_code
+
+    def summary(self) -> Dict[str, Any]:
+        totals: Dict[str, float] = defaultdict(float)
+        for path, _, duration in self.spans:
+            totals[path[-1]] += duration
+        return {
+            "id": self.id,
+            "request": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2),
+            "status_code": self.status_code,
+            "spans_ms": {
+                name: round(total * 1000, 2)
+                for name, total in sorted(totals.items(), key=lambda item: -item[1])
+            },
+        }
+
+    def folded_stacks(self) -> List[str]:
+        """
+        Render the profile in the folded stack format read by flamegraph.pl
+        and speedscope, one `root;child;leaf <self time in us>` per line.
+
+        Spans of the same path are merged. Children that ran concurrently
+        can add up to more than their parent, so self time is clamped at 0.
+        """
+        root = (self.name,)
+        totals: Dict[Tuple[str, ...], float] = defaultdict(float)
+        totals[root] = self.duration
+        for path, _, duration in self.spans:
+            totals[root + path] += duration
+
+        child_totals: Dict[Tuple[str, ...], float] = defaultdict(float)
+        for path, total in totals.items():
+            if len(path) > 1:
+                child_totals[path[:-1]] += total
+
+        lines = []
+        for path, total in totals.items():
+            self_time = max(0.0, total - child_totals[path])
+            micros = int(self_time * 1_000_000)
+            if micros:
+                lines.append(f"{';'.join(path)} {micros}")
+        return lines
+
+
+class SharedProfile:
+    """
+    Stands in for the profiles of several requests served by one shared
+    call, such as a packed LLM batch. Each span is recorded on every one of
+    them, under the span path the request was at when it joined.
+    """
+
+    def __init__(self, members: List[Tuple["Profile", Tuple[str, ...]]]):
+        self.members = members
+
+    def add_span(self, path: Tuple[str, ...], start: float, duration: float) -> None:
+        for profile, prefix in self.members:
+            profile.add_span(prefix + path, start, duration)
+
+
+Profile = Union[RequestProfile, SharedProfile]
+
+# Profile of the request being handled, None when profiling is off
+current_profile: contextvars.ContextVar[Optional[Profile]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+_span_path: contextvars.ContextVar[Tuple[str, ...]] = contextvars.ContextVar(
+    "span_path", default=()
+)
+
+
+def shared_profile(contexts: Iterable[contextvars.Context]) -> Optional[SharedProfile]:
+    """
+    Combine the profiles found in the callers' contexts into one, or return
+    None when none of them is being profiled.
+    """
+    members = []
+    for context in contexts:
+        profile = context.get(current_profile, None)
+        if profile is not None:
+            members.append((profile, context.get(_span_path, ())))
+    return SharedProfile(members) if members else None
+
+
+class _Span:
+    __slots__ = ("profile", "name", "start", "token")
+
+    def __init__(self, profile: Profile, name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.token = _span_path.set(_span_path.get() + (self.name,))
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        path = _span_path.get()
+        _span_path.reset(self.token)
+        self.profile.add_span(path, self.start, end - self.start)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        return self.__exit__(*exc_info)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str):
+    """
+    Time a block as a named span of the current request's profile. Usable
+    with `with` and `async with`; a shared no-op when profiling is off.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, name)
+
+
+class SlowRequestBuffer:
+    """Keeps the `size` slowest profiled requests seen within `window` seconds."""
+
+    def __init__(self, size: int = 20, window: float = 3600.0):
+        self.size = max(1, size)
+        self.window = window
+        self._heap: List[Tuple[float, int, RequestProfile]] = []
+        self._seq = itertools.count()
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.window
+        if any(entry[2].started_at < cutoff for entry in self._heap):
+            self._heap = [e for e in self._heap if e[2].started_at >= cutoff]
+            heapq.heapify(self._heap)
+
+    def add(self, profile: RequestProfile) -> None:
+        self._evict_expired()
+        entry = (profile.duration, next(self._seq), profile)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif profile.duration > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def profiles(self) -> List[RequestProfile]:
+        """Buffered profiles, slowest first."""
+        self._evict_expired()
+        return [entry[2] for entry in sorted(self._heap, reverse=True)]
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self.profiles():
+            if profile.id == profile_id:
+                return profile
+        return None
+
+
+class ProfilingSettings:
+    """Profiling configuration, read from the environment."""
+
+    def __init__(self):
+        self.header = os.getenv("PROFILE_HEADER", "x-profile").lower()
+        self.header_bytes = self.header.encode("latin-1")
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+        self.admin_token = os.getenv("PROFILE_ADMIN_TOKEN", "")
+
+
+_settings: Optional[ProfilingSettings] = None
+_slow_requests: Optional[SlowRequestBuffer] = None
+
+
+def get_profiling_settings() -> ProfilingSettings:
+    """Return the profiling settings, read on first use so .env applies."""
+    global _settings
+    if _settings is None:
+        _settings = ProfilingSettings()
+    return _settings
+
+
+def get_slow_requests() -> SlowRequestBuffer:
+    """Return the shared buffer of the slowest recent profiled requests."""
+    global _slow_requests
+    if _slow_requests is None:
+        _slow_requests = SlowRequestBuffer(
+            size=int(os.getenv("PROFILE_KEEP", 20)),
+            window=float(os.getenv("PROFILE_WINDOW", 3600)),
+        )
+    return _slow_requests
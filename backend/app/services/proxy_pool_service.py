@@ -0,0 +1,314 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import unquote, urlparse
+
+from youtube_transcript_api import _errors
+from youtube_transcript_api.proxies import (
+    GenericProxyConfig,
+    ProxyConfig,
+    WebshareProxyConfig,
+)
+
+from .admission_service import OverloadedError, current_deadline, register_upstream
+from .profiling_service import span
+
+# Errors that mean YouTube throttled or blocked the proxy's IP, so the
+# request is worth retrying through a different proxy
+THROTTLE_ERRORS = (_errors.RequestBlocked, _errors.YouTubeRequestFailed)
+
+
+class ProxyEndpoint:
+    """A single transcript proxy with its health and load statistics."""
+
+    def __init__(
+        self,
+        name: str,
+        config: Optional[ProxyConfig],
+        max_concurrency: int,
+        rotating: bool = False,
+    ):
+        self.name = name
+        self.config = config
+        # A rotating endpoint hands out a new exit IP per request, so a
+        # throttled call says nothing about the next one
+        self.rotating = rotating
+        self.max_concurrency = max(1, max_concurrency)
+        self.active = 0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        # Exponentially weighted averages of latency (seconds) and error rate
+        self.avg_latency = 0.0
+        self.error_rate = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return self.ejected_until <= now and self.active < self.max_concurrency
+
+    def score(self) -> float:
+        """Lower is better: prefer idle, fast and reliable proxies."""
+        load = self.active / self.max_concurrency
+        return (1 + load) * (1 + self.avg_latency) * (1 + 4 * self.error_rate)
+
+    def record(self, ok: bool, latency: float) -> None:
+        sample = 0.0 if ok else 1.0
+        self.error_rate = 0.8 * self.error_rate + 0.2 * sample
+        if ok:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.ejections = 0
+            self.avg_latency = (
+                latency if self.successes == 1 else 0.8 * self.avg_latency + 0.2 * latency
+            )
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "ejected": self.ejected_until > now,
+            "readmit_in": round(max(0.0, self.ejected_until - now), 1),
+            "avg_latency": round(self.avg_latency, 4),
+            "error_rate": round(self.error_rate, 4),
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class ProxyPool:
+    """
+    Pool of transcript proxies with per-proxy concurrency caps.
+
+    Each call is routed to the least loaded healthy proxy. Proxies that get
+    throttled, or fail repeatedly, are ejected for a cooldown that doubles
+    on every consecutive ejection, and re-admitted once it expires.
+    Rotating endpoints and the last healthy proxy are never ejected, their
+    errors are only recorded.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[ProxyEndpoint],
+        cooldown: float = 60.0,
+        max_cooldown: float = 900.0,
+        failure_threshold: int = 3,
+        max_attempts: int = 3,
+        max_wait: float = 15.0,
+    ):
+        self.endpoints = endpoints
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failure_threshold = failure_threshold
+        self.max_attempts = max(1, max_attempts)
+        # Longest a call waits for a free proxy when no deadline is set
+        self.max_wait = max_wait
+        # Set and replaced whenever a proxy is released
+        self._released: Optional[asyncio.Event] = None
+
+    @classmethod
+    def from_env(cls) -> "ProxyPool":
+        """
+        Build the pool from TRANSCRIPT_PROXIES, a comma separated list of
+        proxy URLs. `webshare://user:pass` entries use Webshare's rotating
+        residential endpoint, anything else is used as a generic proxy URL.
+        Without any proxies, transcripts are fetched directly.
+
+        Each proxy is named by its position in the list, username and
+        address, so entries sharing a gateway stay distinct in retries and
+        stats.
+        """
+        max_concurrency = int(os.getenv("TRANSCRIPT_PROXY_CONCURRENCY", 2))
+        entries = [
+            entry.strip()
+            for entry in os.getenv("TRANSCRIPT_PROXIES", "").split(",")
+            if entry.strip()
+        ]
+
+        endpoints = []
+        for index, entry in enumerate(entries, start=1):
+            parsed = urlparse(entry)
+            if parsed.scheme == "webshare":
+                username, _, password = parsed.netloc.partition(":")
+                config = WebshareProxyConfig(
+                    proxy_username=unquote(username),
+                    proxy_password=unquote(password),
+                )
+                name = f"{index}:webshare:{unquote(username)}"
+                rotating = True
+            else:
+                config = GenericProxyConfig(http_url=entry, https_url=entry)
+                # Gateways like p.webshare.io tell identities apart by
+                # username alone, so include it (never the password)
+                user = f"{unquote(parsed.username)}@" if parsed.username else ""
+                name = f"{index}:{user}{parsed.hostname}:{parsed.port}"
+                rotating = False
+            endpoints.append(ProxyEndpoint(name, config, max_concurrency, rotating))
+
+        if not endpoints:
+            print(
+                "Warning: TRANSCRIPT_PROXIES is not set, fetching transcripts without a proxy"
+            )
+            endpoints.append(ProxyEndpoint("direct", None, max_concurrency))
+
+        return cls(
+            endpoints,
+            cooldown=float(os.getenv("TRANSCRIPT_PROXY_COOLDOWN", 60)),
+            max_attempts=int(os.getenv("TRANSCRIPT_PROXY_MAX_ATTEMPTS", 3)),
+            max_wait=float(os.getenv("TRANSCRIPT_PROXY_MAX_WAIT", 15)),
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Total concurrent requests the pool can carry."""
+        return sum(endpoint.max_concurrency for endpoint in self.endpoints)
+
+    def _pick(self, exclude: Set[str]) -> Optional[ProxyEndpoint]:
+        now = time.monotonic()
+        candidates = [
+            endpoint
+            for endpoint in self.endpoints
+            if endpoint.name not in exclude and endpoint.is_available(now)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda endpoint: endpoint.score())
+
+    async def acquire(self, exclude: Optional[Set[str]] = None) -> ProxyEndpoint:
+        """
+        Wait for a healthy proxy with a free slot, skipping `exclude`. The
+        wait is bounded by the request deadline, or `max_wait` without one.
+        """
+        exclude = exclude or set()
+        deadline = current_deadline.get()
+        if deadline is None:
+            deadline = time.monotonic() + self.max_wait
+        while True:
+            endpoint = self._pick(exclude)
+            if endpoint is not None:
+                endpoint.active += 1
+                return endpoint
+
+            now = time.monotonic()
+            usable = [e for e in self.endpoints if e.name not in exclude]
+            healthy = [e for e in usable if e.ejected_until <= now]
+            if not healthy:
+                readmit_at = min((e.ejected_until for e in usable), default=now)
+                raise OverloadedError(
+                    "transcript: no healthy proxy available",
+                    status_code=503,
+                    retry_after=readmit_at - now,
+                )
+
+            # Every healthy proxy is at its cap, wait for a release
+            if self._released is None:
+                self._released = asyncio.Event()
+            try:
+                await asyncio.wait_for(
+                    self._released.wait(), max(0.0, deadline - now)
+                )
+            except asyncio.TimeoutError:
+                raise OverloadedError(
+                    "transcript: timed out waiting for a free proxy",
+                    status_code=503,
+                )
+
+    def release(
+        self, endpoint: ProxyEndpoint, ok: bool, latency: float, throttled: bool = False
+    ) -> None:
+        """Return a proxy to the pool, recording the outcome of the call."""
+        endpoint.active -= 1
+        endpoint.record(ok, latency)
+
+        if (
+            throttled or endpoint.consecutive_failures >= self.failure_threshold
+        ) and self._can_eject(endpoint):
+            cooldown = min(self.cooldown * 2**endpoint.ejections, self.max_cooldown)
+            endpoint.ejections += 1
+            endpoint.consecutive_failures = 0
+            endpoint.ejected_until = time.monotonic() + cooldown
+            print(f"Ejecting transcript proxy {endpoint.name} for {cooldown:.0f}s")
+
+        if self._released is not None:
+            self._released.set()
+            self._released = None
+
+    def _can_eject(self, endpoint: ProxyEndpoint) -> bool:
+        if endpoint.rotating:
+            return False
+        now = time.monotonic()
+        return any(
+            other is not endpoint and other.ejected_until <= now
+            for other in self.endpoints
+        )
+
+    async def run(self, call: Callable[[Optional[ProxyConfig]], Any]) -> Any:
+        """
+        Run the blocking `call(proxy_config)` in a worker thread through a
+        pooled proxy, retrying on a different proxy when YouTube throttles
+        or the proxy itself fails.
+        """
+        # Rotating endpoints may be retried, they exit through a new IP
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_attempts):
+            if attempt and all(e.name in tried for e in self.endpoints):
+                break
+            try:
+                endpoint = await self.acquire(tried)
+            except OverloadedError:
+                if last_error is None:
+                    raise
+                break
+            if not endpoint.rotating:
+                tried.add(endpoint.name)
+
+            started = time.monotonic()
+            ok, throttled = False, False
+            try:
+                with span(f"proxy:{endpoint.name}"):
+                    result = await asyncio.to_thread(call, endpoint.config)
+                ok = True
+                return result
+            except THROTTLE_ERRORS as e:
+                throttled = True
+                last_error = e
+            except _errors.CouldNotRetrieveTranscript:
+                # The video itself has no usable transcript, the proxy is fine
+                ok = True
+                raise
+            except Exception as e:
+                last_error = e
+            finally:
+                self.release(endpoint, ok, time.monotonic() - started, throttled)
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "capacity": self.capacity,
+            "proxies": {
+                endpoint.name: endpoint.stats(now) for endpoint in self.endpoints
+            },
+        }
+
+
+_transcript_proxy_pool: Optional[ProxyPool] = None
+
+
+def get_transcript_proxy_pool() -> ProxyPool:
+    """
+    Return the transcript proxy pool, building it on first use so settings
+    loaded from .env apply. Transcript throughput scales with the number
+    of proxies supplied, so the upstream limit is sized to the pool.
+    """
+    global _transcript_proxy_pool
+    if _transcript_proxy_pool is None:
+        _transcript_proxy_pool = ProxyPool.from_env()
+        register_upstream("transcript", _transcript_proxy_pool.capacity)
+    return _transcript_proxy_pool
@@ -0,0 +1,278 @@
+import asyncio
+import heapq
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..schemas.response_models import VideoSearchResult
+
+# Weight added each time a normalized query is searched, or a video title is
+# seen in search results
+QUERY_WEIGHT = 1.0
+TITLE_WEIGHT = 0.25
+
+# Trie depth is capped, longer prefixes are matched by filtering the
+# candidates cached at the deepest node
+MAX_PREFIX_LENGTH = 32
+MAX_TERM_LENGTH = 120
+TOP_K = 10
+
+# Evict down to this fraction of max_terms when the index is full, so pruning
+# runs once per few thousand new terms rather than on every insert
+PRUNE_TO = 0.9
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"[^\w\s'+#-]", " ", text)
+    return " ".join(text.split())[:MAX_TERM_LENGTH]
+
+
+class _Node:
+    __slots__ = ("children", "top", "count")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # Number of terms at or below this node
+        self.count = 0
+        # Best (weight, term) pairs below this node, highest weight first
+        self.top: List[Tuple[float, str]] = []
+
+
+class SuggestionIndex:
+    """
+    In-memory prefix trie over past queries and seen video titles.
+
+    Every node caches its TOP_K heaviest completions, so a lookup is a walk
+    down at most MAX_PREFIX_LENGTH nodes and a copy of a short list. Weights
+    only ever grow, which lets updates refresh the cached lists along a
+    single path instead of rebuilding them.
+
+    The index holds at most `max_terms` terms; when full, the lightest are
+    evicted. This bounds memory and the size of each snapshot.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        snapshot_every: int = 50,
+        max_terms: int = 50000,
+    ):
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.max_terms = max_terms
+        self._root = _Node()
+        self._weights: Dict[str, float] = {}
+        self._dirty = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def add(self, text: str, weight: float = QUERY_WEIGHT) -> None:
+        """Add weight to a term, inserting it if it is new."""
+        term = normalize_query(text)
+        if not term:
+            return
+
+        is_new = term not in self._weights
+        total = self._weights.get(term, 0.0) + weight
+        self._weights[term] = total
+        self._dirty += 1
+
+        node = self._root
+        node.count += is_new
+        self._update_top(node, term, total)
+        for char in term[:MAX_PREFIX_LENGTH]:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            node.count += is_new
+            self._update_top(node, term, total)
+
+        if is_new and len(self._weights) > self.max_terms:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Evict the lightest terms until the index is back under its cap."""
+        excess = len(self._weights) - int(self.max_terms * PRUNE_TO)
+        lightest = heapq.nsmallest(
+            excess, self._weights.items(), key=lambda item: item[1]
+        )
+        stale: Set[str] = set()
+        for term, _ in lightest:
+            del self._weights[term]
+            self._remove(term, stale)
+        self._refill(stale)
+
+    def _remove(self, term: str, stale: Set[str]) -> None:
+        """Unlink a term, adding the prefixes whose cached list lost it to `stale`."""
+        node = self._root
+        node.count -= 1
+        prefix = ""
+        for char in term[:MAX_PREFIX_LENGTH]:
+            if any(entry[1] == term for entry in node.top):
+                node.top = [entry for entry in node.top if entry[1] != term]
+                stale.add(prefix)
+            child = node.children[char]
+            child.count -= 1
+            if child.count == 0:
+                # Nothing else lives below, drop the whole branch
+                del node.children[char]
+                return
+            node = child
+            prefix += char
+        if any(entry[1] == term for entry in node.top):
+            node.top = [entry for entry in node.top if entry[1] != term]
+            stale.add(prefix)
+
+    def _refill(self, prefixes: Iterable[str]) -> None:
+        """
+        Recompute the cached lists that lost entries and now hold fewer
+        completions than their subtree has, deepest first so each parent
+        merges up-to-date children. Nodes at the depth cap have no children
+        and are refilled with a single scan of the weights.
+        """
+        nodes: Dict[str, _Node] = {}
+        for prefix in prefixes:
+            node = self._root
+            for char in prefix:
+                node = node.children.get(char)
+                if node is None:
+                    break
+            if node is not None and len(node.top) < min(TOP_K, node.count):
+                nodes[prefix] = node
+
+        capped = {p: [] for p in nodes if len(p) >= MAX_PREFIX_LENGTH}
+        if capped:
+            for term, weight in self._weights.items():
+                entries = capped.get(term[:MAX_PREFIX_LENGTH])
+                if entries is not None:
+                    entries.append((weight, term))
+
+        for prefix in sorted(nodes, key=len, reverse=True):
+            node = nodes[prefix]
+            candidates = capped.get(prefix)
+            if candidates is None:
+                candidates = [
+                    entry for child in node.children.values() for entry in child.top
+                ]
+                if prefix in self._weights:
+                    candidates.append((self._weights[prefix], prefix))
+            node.top = heapq.nsmallest(
+                TOP_K, candidates, key=lambda entry: (-entry[0], entry[1])
+            )
+
+    @staticmethod
+    def _update_top(node: _Node, term: str, weight: float) -> None:
+        top = node.top
+        for i, (_, existing) in enumerate(top):
+            if existing == term:
+                del top[i]
+                break
+        else:
+            if len(top) >= TOP_K and weight <= top[-1][0]:
+                return
+
+        top.append((weight, term))
+        top.sort(key=lambda entry: (-entry[0], entry[1]))
+        del top[TOP_K:]
+
+    def suggest(self, prefix: str, limit: int = TOP_K) -> List[str]:
+        """Return up to `limit` completions of `prefix`, heaviest first."""
+        prefix = normalize_query(prefix)
+        if not prefix:
+            return []
+
+        node = self._root
+        for char in prefix[:MAX_PREFIX_LENGTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        if len(prefix) > MAX_PREFIX_LENGTH:
+            return [term for _, term in node.top if term.startswith(prefix)][:limit]
+        return [term for _, term in node.top[:limit]]
+
+    def record_search(
+        self,
+        query: str,
+        videos: Iterable[VideoSearchResult] = (),
+        video_reference: bool = False,
+    ) -> None:
+        """
+        Learn from a completed search: its query and the titles it returned.
+        A query that resolved as a video URL or ID is not a topic, so only
+        its titles are learned.
+        """
+        if not video_reference:
+            self.add(query, QUERY_WEIGHT)
+        for video in videos:
+            self.add(video.title, TITLE_WEIGHT)
+        self._maybe_snapshot()
+
+    def record_video(self, video: VideoSearchResult) -> None:
+        """Learn the title of a video that was looked up directly."""
+        self.add(video.title, TITLE_WEIGHT)
+        self._maybe_snapshot()
+
+    def load(self) -> None:
+        """Rebuild the trie from the snapshot on disk, if there is one."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                weights = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load suggestion index snapshot: {str(e)}")
+            return
+
+        # Insert heaviest terms first so most cached lists fill without churn
+        for term, weight in sorted(weights.items(), key=lambda item: -item[1]):
+            self.add(term, weight)
+        self._dirty = 0
+        print(f"Loaded {len(self)} suggestion terms from {self.snapshot_path}")
+
+    def _write_snapshot(self, weights: Dict[str, float]) -> None:
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(weights, f, ensure_ascii=False)
+        os.replace(tmp_path, self.snapshot_path)
+
+    async def snapshot(self) -> None:
+        """Write the term weights to disk without blocking the event loop."""
+        if not self.snapshot_path:
+            return
+        self._dirty = 0
+        try:
+            await asyncio.to_thread(self._write_snapshot, dict(self._weights))
+        except OSError as e:
+            print(f"Could not write suggestion index snapshot: {str(e)}")
+
+    def _maybe_snapshot(self) -> None:
+        if not self.snapshot_path or self._dirty < self.snapshot_every:
+            return
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            return
+        self._snapshot_task = asyncio.get_running_loop().create_task(self.snapshot())
+
+
+_suggestion_index: Optional[SuggestionIndex] = None
+
+
+def get_suggestion_index() -> SuggestionIndex:
+    """Return the shared index, built on first use so .env settings apply."""
+    global _suggestion_index
+    if _suggestion_index is None:
+        _suggestion_index = SuggestionIndex(
+            snapshot_path=os.getenv("SUGGEST_INDEX_PATH", "data/suggest_index.json"),
+            snapshot_every=int(os.getenv("SUGGEST_SNAPSHOT_EVERY", 50)),
+            max_terms=int(os.getenv("SUGGEST_MAX_TERMS", 50000)),
+        )
+    return _suggestion_index
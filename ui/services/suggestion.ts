@@ -1,9 +1,8 @@
 import axiosClient from './client'
 
 export const getSuggestions = async (query: string) => {
-    const result = await axiosClient.get(`api/v1/search?query=${query}`)
-    console.log('result', result)
-    return result.data;
+    const result = await axiosClient.get(`/api/suggest`, { params: { q: query } })
+    return result.data.suggestions;
 }
 
 export const getTranscipt = async (videoId: string) => {